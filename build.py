@@ -0,0 +1,81 @@
+import PyInstaller.__main__
+import os
+import sys
+import shutil
+
+# 单一构建脚本 (Windows / Mac 共用)，平台差异集中在下方配置
+IS_MAC = sys.platform == 'darwin'
+
+if IS_MAC:
+    APP_NAME = "BioData_v1_2"
+    PLATFORM_FLAGS = []                # Mac: 默认输出到 dist/
+    ARTIFACT_HINT = f"dist/{APP_NAME} (Unix executable)"
+else:
+    APP_NAME = "BioData v1.2"
+    PLATFORM_FLAGS = ['--distpath=.']  # Windows: Output to root directory
+    ARTIFACT_HINT = f"./{APP_NAME}.exe (Project Root)"
+
+# [关键] 强制包含科学计算库的隐藏依赖
+# 这是 PyInstaller 打包 Pandas/Scipy/Matplotlib 时最容易缺少的模块
+# 注意: openpyxl/xlsxwriter 在 core/artifact_manager.py 中为函数内延迟导入 (Lazy Import),
+# 保留显式声明，确保打包后首次导出 Excel 时不会缺模块
+HIDDEN_IMPORTS = [
+    'scipy.special._ufuncs',
+    'scipy.special._cdflib',
+    'scipy.spatial.transform._rotation_groups',
+    'pandas._libs.tslibs.base',
+    'openpyxl',       # Excel 读写依赖
+    'xlsxwriter',     # Excel 格式化依赖
+    'seaborn',
+    'matplotlib.backends.backend_agg',  # 只保存图片，不弹 GUI 窗口 (无需 TkAgg)
+    'matplotlib.backends.backend_pdf',
+    'matplotlib.backends.backend_svg',
+    # 插件由 core/dispatcher.py 按字符串延迟导入，静态分析看不到，必须显式声明
+    'plugins.boxplot',
+    'plugins.scatter',
+    'plugins.volcano',
+    'plugins.heatmap',
+]
+
+# [瘦身] 排除不随程序发布的大型子模块 (测试集 / GUI / 交互环境)
+# --onefile 每次启动都要解压全部文件，体积越小冷启动越快
+EXCLUDE_MODULES = [
+    'tkinter',
+    'scipy.tests',
+    'numpy.tests',
+    'pandas.tests',
+    'matplotlib.tests',
+    'IPython',
+    'pytest',
+    'notebook',
+    'jupyter',
+]
+
+# 1. 清理旧的构建环境 (防止缓存导致的怪异 bug)
+print("Cleaning previous build artifacts...")
+if os.path.exists('build'):
+    shutil.rmtree('build')
+if os.path.exists('dist'):
+    shutil.rmtree('dist')
+if os.path.exists(f"{APP_NAME}.spec"):
+    os.remove(f'{APP_NAME}.spec')
+
+print(f"Starting build process for {APP_NAME} ({'Mac' if IS_MAC else 'Windows'})...")
+
+# 2. 执行 PyInstaller 打包指令
+# 等同于在终端运行: pyinstaller main.py --onefile ...
+PyInstaller.__main__.run([
+    'main.py',
+    f'--name={APP_NAME}',
+    '--onefile',
+    '--console',      # CLI Tool: Must rely on Terminal for input/output
+    '--clean',
+    '--noconfirm',
+    *PLATFORM_FLAGS,
+    *[f'--hidden-import={m}' for m in HIDDEN_IMPORTS],
+    *[f'--exclude-module={m}' for m in EXCLUDE_MODULES],
+])
+
+print("-" * 50)
+print(f"Build Success! Executable is located at: {ARTIFACT_HINT}")
+print("-" * 50)
@@ -1,11 +1,12 @@
-import os
 import json
 import hashlib
 import time
 import logging
-import pandas as pd 
-import matplotlib.pyplot as plt 
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# [Lazy Import] pandas / xlsxwriter / openpyxl 在首次使用时才导入，缩短 CLI 冷启动时间
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,15 @@ class ArtifactManager:
     负责管理所有文件的输出、沙箱创建和审计日志。
     支持自定义输出路径 (Output data) 和 智能命名。
     """
+    # 超过此单元格数的导出切换到 openpyxl write-only 引擎
+    LARGE_EXPORT_CELLS = 1_000_000
+    # 指纹采样: 超过 2 倍此行数时只哈希首尾各 N 行
+    HASH_SAMPLE_ROWS = 1000
+    # 指纹算法版本: 修改哈希方式 (喂入顺序/字段) 时递增，使旧缓存失效
+    HASH_SCHEME_VERSION = 1
+    # 指纹缓存: {源文件绝对路径: {mtime_ns, size, config, scheme, digest, mode}}，文件未变时跳过哈希
+    HASH_CACHE_PATH = Path('.bd_cache') / 'input_hashes.json'
+
     def __init__(self, run_id, config=None):
         self.run_id = run_id
         self.config = config or {}
@@ -66,7 +76,7 @@ class ArtifactManager:
         # 创建目录
         self._create_sandbox()
 
-        # 审计日志字典
+        # 审计日志字典 (Operations 不常驻内存，见 log_audit)
         self.audit_log = {
             "RunID": self.run_id,
             "Timestamp": time.strftime("%d%m%Y_%H%M%S"),
@@ -75,6 +85,17 @@ class ArtifactManager:
             "Operations": []
         }
 
+        # [Streaming] 每条操作立即追加到 audit_log.jsonl (行缓冲)，崩溃也不会丢失
+        self._audit_stream_path = self.sandbox_dir / "audit_log.jsonl"
+        self._audit_fp = open(self._audit_stream_path, 'a', encoding='utf-8', buffering=1)
+        self._audit_lock = threading.Lock()
+        self._last_ts_int = 0
+        self._last_ts_str = ''
+
+        # 后台 I/O 线程 (PNG 预览图异步写入)，首次 save_figure 时创建
+        self._io_pool = None
+        self._pending_io = []
+
     def _create_sandbox(self):
         try:
             self.sandbox_dir.mkdir(parents=True, exist_ok=True)
@@ -84,46 +105,169 @@ class ArtifactManager:
             raise
     
     def log_audit(self, message):
-        """记录关键操作到审计日志"""
-        entry = f"{time.strftime('%H:%M:%S')} - {message}"
-        self.audit_log["Operations"].append(entry)
+        """记录关键操作到审计日志 (流式写入 JSONL，可能来自后台 I/O 线程)"""
+        with self._audit_lock:
+            # 时间戳按秒缓存，同一秒内的多条日志不再重复调用 localtime/strftime
+            now = int(time.time())
+            if now != self._last_ts_int:
+                self._last_ts_int = now
+                self._last_ts_str = time.strftime('%H:%M:%S', time.localtime(now))
+
+            if self._audit_fp is not None:
+                line = json.dumps({"t": self._last_ts_str, "msg": message}, ensure_ascii=False)
+                self._audit_fp.write(line + "\n")
         logger.info(message)
     
-    def calculate_input_hash(self, config, df):
-        """计算输入数据的指纹 (Config + Data)"""
+    def calculate_input_hash(self, config, df, source_path=None):
+        """
+        计算输入数据的指纹 (Config + Data)
+        逐列增量喂入 blake2b，不再构建与数据同尺寸的哈希 Series
+        超过 2 * HASH_SAMPLE_ROWS 行时只采样首尾各 HASH_SAMPLE_ROWS 行 (常数时间)，
+        采样模式会记录在审计日志的 InputHashMode 中
+        source_path: 原始数据文件；给出时按 (路径, mtime, size, config) 复用上次的指纹
+        """
         try:
-            config_str = json.dumps(config, sort_keys=True)
-            data_hash = pd.util.hash_pandas_object(df).sum()
-            raw_signature = f"{config_str}|{data_hash}"
-            signature = hashlib.sha256(raw_signature.encode()).hexdigest()[:16]
+            import pandas as pd
+            from core.cleaner import DataCleaner
+
+            config_json = json.dumps(config, sort_keys=True)
+
+            # [Memoize] 同一文件 + 同一配置 + 同一清洗/哈希规则 -> 清洗结果相同 -> 指纹相同，直接复用
+            cache_key, cache_entry = None, None
+            try:
+                st = Path(source_path).stat() if source_path is not None else None
+            except OSError:
+                st = None
+            if st is not None:
+                cache_key = str(Path(source_path).resolve())
+                cache_entry = {
+                    "mtime_ns": st.st_mtime_ns, "size": st.st_size, "config": config_json,
+                    # 指纹取自清洗后的数据: 清洗规则或哈希方案变化时缓存必须失效
+                    "scheme": [self.HASH_SCHEME_VERSION, self.HASH_SAMPLE_ROWS, DataCleaner.VERSION],
+                }
+                cached = self._load_hash_cache().get(cache_key)
+                if cached and all(cached.get(k) == v for k, v in cache_entry.items()):
+                    self.audit_log["InputHashMode"] = f"{cached['mode']} (cached)"
+                    self.audit_log["InputHash"] = cached["digest"]
+                    return cached["digest"]
+
+            h = hashlib.blake2b(digest_size=16)
+            h.update(config_json.encode())
+
+            # 前缀: 形状 + 列名 + 类型 (结构不同则指纹必然不同)
+            h.update(repr((df.shape, [str(c) for c in df.columns], [str(t) for t in df.dtypes])).encode())
+
+            k = self.HASH_SAMPLE_ROWS
+            if len(df) > 2 * k:
+                parts = (df.head(k), df.tail(k))
+                self.audit_log["InputHashMode"] = f"Sampled (shape + first/last {k} rows)"
+            else:
+                parts = (df,)
+                self.audit_log["InputHashMode"] = "Full"
+
+            for part in parts:
+                h.update(pd.util.hash_array(part.index.to_numpy()).tobytes())
+                for _, col in part.items():
+                    values = col.to_numpy()
+                    if values.dtype.kind in 'biufcmM':
+                        # 原生数值缓冲区，直接喂入
+                        h.update(values.tobytes())
+                    else:
+                        # 文本/混合列先做 pandas 向量化哈希
+                        h.update(pd.util.hash_array(values).tobytes())
+
+            signature = h.hexdigest()[:16]
             self.audit_log["InputHash"] = signature
+            if cache_key is not None:
+                cache_entry.update(digest=signature, mode=self.audit_log["InputHashMode"])
+                self._store_hash_cache(cache_key, cache_entry)
             return signature
         except Exception as e:
             logger.warning(f"Hash calculation failed: {e}")
             return "HASH_FAILED"
 
+    def _load_hash_cache(self):
+        """读取指纹缓存 (不存在或损坏时视为空)"""
+        try:
+            with open(self.HASH_CACHE_PATH, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _store_hash_cache(self, key, entry):
+        """写回指纹缓存；失败只记 debug，不影响本次运行"""
+        try:
+            cache = self._load_hash_cache()
+            cache[key] = entry
+            self.HASH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.HASH_CACHE_PATH, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            logger.debug(f"Hash cache not written: {e}")
+
     def save_figure(self, fig, name):
-        """同时保存 PDF (Vector) 和 PNG (Preview)"""
+        """
+        同时保存 PDF (Vector) 和 PNG (Preview)
+        PDF 在当前线程写入；300dpi PNG (压缩耗时) 交给后台 I/O 线程，
+        与后续的 Excel 导出重叠执行。close() 前会等待其完成。
+        """
         try:
             pdf_path = self.sandbox_dir / f"{name}.pdf"
-            fig.savefig(pdf_path, format='pdf', bbox_inches='tight')
+            # CreationDate=None：不写入时间戳，省去时区查询，同一输入产出的 PDF 字节一致
+            fig.savefig(pdf_path, format='pdf', bbox_inches='tight', metadata={'CreationDate': None})
             
             png_path = self.sandbox_dir / f"{name}.png"
-            fig.savefig(png_path, format='png', dpi=300, bbox_inches='tight')
 
-            self.log_audit(f"Artifact Saved: {name} (PDF+PNG)")
+            # 注意: 同一 Figure 不能被两个线程同时绘制，所以 PNG 必须在 PDF 完成后才提交
+            def write_png():
+                fig.savefig(png_path, format='png', dpi=300, bbox_inches='tight')
+                self.log_audit(f"Artifact Saved: {name} (PDF+PNG)")
+
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(max_workers=1)
+            self._pending_io.append((name, self._io_pool.submit(write_png)))
             return str(pdf_path)
         except Exception as e:
             logger.error(f"Failed to save figure: {e}")
             raise
+
+    def wait_pending_io(self):
+        """
+        阻塞到已提交的后台写入全部结束 (如 Figure 被清空复用前)。
+        不取结果也不抛异常，失败仍由 close() 统一汇报。
+        """
+        if self._pending_io:
+            wait([future for _, future in self._pending_io])
+
+    def _flush_pending_io(self):
+        """等待所有后台写入完成；若有失败则抛出第一个异常"""
+        pending, self._pending_io = self._pending_io, []
+        first_error = None
+        for name, future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Failed to save figure '{name}': {e}")
+                first_error = first_error or e
+
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
+
+        if first_error is not None:
+            raise first_error
     
-    def save_data(self, data_content, name):
+    def save_data(self, data_content, name, float_decimals=None):
         """
         [Upgrade] 保存多 Sheet 且带边框的 Excel (需要安装 xlsxwriter)
+        超大数据 (> LARGE_EXPORT_CELLS 个单元格) 改用 openpyxl write-only 模式 (无边框)
         Args:
             data_content: pd.DataFrame OR dict { 'SheetName': df, ... }
+            float_decimals: optional dict { 'SheetName': n }, 写入时把该 Sheet 的浮点列四舍五入到 n 位
         """
         try:
+            import pandas as pd
+
             xlsx_path = self.sandbox_dir / f"{name}.xlsx"
             
             # 统一转为字典格式
@@ -132,30 +276,127 @@ class ArtifactManager:
             else:
                 data_dict = data_content
 
-            # 使用 xlsxwriter 引擎
-            with pd.ExcelWriter(xlsx_path, engine='xlsxwriter') as writer:
-                for sheet_name, df in data_dict.items():
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # 获取 formatted objects
-                    workbook  = writer.book
-                    worksheet = writer.sheets[sheet_name]
-                    
-                    # 定义黑色边框
-                    border_fmt = workbook.add_format({'border': 1})
-                    
-                    # 给有数据的区域画格子 (conditional_format)
-                    if len(df) > 0:
-                        worksheet.conditional_format(0, 0, len(df), len(df.columns)-1,
-                                                    {'type': 'no_errors', 'format': border_fmt})
+            # 按数据量选择引擎
+            total_cells = sum(df.size for df in data_dict.values())
+            if total_cells > self.LARGE_EXPORT_CELLS:
+                logger.info(f"Large export ({total_cells} cells): using openpyxl write-only mode (no borders).")
+                self._save_large_openpyxl(data_dict, xlsx_path, float_decimals or {})
+            else:
+                self._save_styled_xlsxwriter(data_dict, xlsx_path, float_decimals or {})
 
             self.log_audit(f"Data Saved: {name}.xlsx (Sheets: {list(data_dict.keys())})")
             
         except Exception as e:
-            logger.error(f"Failed to save data: {e}. Ensure xlsxwriter is installed.")
+            logger.error(f"Failed to save data: {e}. Ensure xlsxwriter/openpyxl is installed.")
+
+    def _save_styled_xlsxwriter(self, data_dict, xlsx_path, float_decimals):
+        """直接使用 xlsxwriter 逐行写入 (绕过 pandas to_excel 的逐格样式处理)"""
+        import pandas as pd
+        import xlsxwriter
+
+        # constant_memory: 逐行刷盘 (本方法严格按行顺序写入，满足其限制)
+        # 关闭 URL/公式/数字 的字符串自动识别: 省去对每个文本单元格的扫描，
+        # 同时保证 "=..." 之类的分组标签按原样以文本写入
+        workbook = xlsxwriter.Workbook(str(xlsx_path), {
+            'constant_memory': True,
+            'strings_to_urls': False,
+            'strings_to_formulas': False,
+            'strings_to_numbers': False,
+        })
+        try:
+            # 定义黑色边框 (每个 Workbook 只创建一次)
+            header_fmt = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+            border_fmt = workbook.add_format({'border': 1})
+            # [Fix] 日期列需要显式的数字格式，否则 Excel 只显示序列号 (e.g. 45293.13)
+            datetime_fmt = workbook.add_format({'border': 1, 'num_format': 'yyyy-mm-dd hh:mm:ss'})
+
+            for sheet_name, df in data_dict.items():
+                worksheet = workbook.add_worksheet(sheet_name)
+                worksheet.write_row(0, 0, [str(c) for c in df.columns], header_fmt)
+                datetime_cols = [j for j, (_, col) in enumerate(df.items())
+                                 if pd.api.types.is_datetime64_any_dtype(col)]
+                for i, row in enumerate(self._excel_rows(df, float_decimals.get(sheet_name)), start=1):
+                    worksheet.write_row(i, 0, row, border_fmt)
+                    # 同一行内覆盖写入日期单元格 (constant_memory 允许在当前行内重写)
+                    for j in datetime_cols:
+                        if row[j] is not None:
+                            worksheet.write_datetime(i, j, row[j], datetime_fmt)
+        finally:
+            workbook.close()
+
+    def _save_large_openpyxl(self, data_dict, xlsx_path, float_decimals):
+        """openpyxl write-only 流式写入 (低内存，跳过边框以避免单元格物化)"""
+        import openpyxl
+        import pandas as pd
+        from openpyxl.cell import WriteOnlyCell
+
+        def as_text(worksheet, value):
+            # [Fix] openpyxl 会把 "=..." 字符串当作公式写入；显式标记为文本
+            # (与 xlsxwriter 路径的 strings_to_formulas=False 行为一致)
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.data_type = 's'
+            return cell
+
+        workbook = openpyxl.Workbook(write_only=True)
+        for sheet_name, df in data_dict.items():
+            worksheet = workbook.create_sheet(sheet_name)
+            worksheet.append([as_text(worksheet, h) if h.startswith('=') else h
+                              for h in (str(c) for c in df.columns)])
+            # 只有非数值列可能含有字符串，逐行只检查这些列
+            text_cols = [j for j, (_, col) in enumerate(df.items())
+                         if not pd.api.types.is_numeric_dtype(col)]
+            for row in self._excel_rows(df, float_decimals.get(sheet_name)):
+                for j in text_cols:
+                    v = row[j]
+                    if isinstance(v, str) and v.startswith('='):
+                        row[j] = as_text(worksheet, v)
+                worksheet.append(row)
+        workbook.save(xlsx_path)
+
+    @staticmethod
+    def _excel_rows(df, decimals=None):
+        """
+        逐行产出可写入 Excel 的原生值: NaN -> 空白单元格, inf -> 文本 (与 pandas to_excel 行为一致)
+        只物化一个 2-D object 数组并按行切片，绝不使用 df.iloc[i] (每行构造一个 Series)
+        decimals: 写入时对浮点列逐列取整 (等价于 df.round(decimals)，但不额外复制整张表)
+        """
+        import numpy as np
+        import pandas as pd
+
+        values = df.to_numpy(dtype=object, copy=True)
+        for j, (_, col) in enumerate(df.items()):
+            if pd.api.types.is_float_dtype(col):
+                arr = col.to_numpy()
+                if decimals is not None:
+                    values[:, j] = np.round(arr, decimals)
+                inf_mask = np.isinf(arr)
+                if inf_mask.any():
+                    values[inf_mask, j] = np.where(arr[inf_mask] > 0, 'inf', '-inf')
+        values[pd.isna(values)] = None
+
+        for row in values:
+            yield row.tolist()
 
     def close(self):
-        """收尾：写入最终的 audit.json"""
+        """收尾：等待后台写入完成，再写入最终的 audit.json"""
+        try:
+            self._flush_pending_io()
+        finally:
+            self._write_audit_log()
+
+    def _write_audit_log(self):
+        """将 audit_log.jsonl 汇总为最终的 audit_log.json (审计日志封存)"""
+        with self._audit_lock:
+            if self._audit_fp is not None:
+                self._audit_fp.close()
+                self._audit_fp = None
+
+        if self._audit_stream_path.exists():
+            with open(self._audit_stream_path, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            self.audit_log["Operations"] = [f"{rec['t']} - {rec['msg']}" for rec in records]
+            self._audit_stream_path.unlink()
+
         audit_path = self.sandbox_dir / "audit_log.json"
         with open(audit_path, 'w', encoding="utf-8") as f:
             json.dump(self.audit_log, f, indent=2, ensure_ascii=False)
@@ -1,11 +1,35 @@
 import pandas as pd 
 import numpy as np 
 import re 
+import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # 获取 logger，遵循 logging 本地化原则
 logger = logging.getLogger(__name__)
 
+# 预编译正则 (模块级常量，只编译一次)
+# ^ : Start
+# [-+]? : Optional Sign
+# \d*\.?\d+ : Numbers (supports 10, 10.5, .5)
+# ([eE][-+]?\d+)? : Optional Exponent (e-5, E+10)
+_NUM_RE = re.compile(r'^([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)')  # Scientific Notation Supported
+_ND_RE = re.compile(r'^n\.?d\.?$', re.IGNORECASE)            # ND, N.D., nd, n.d.
+_NAN_LITERALS = frozenset({'nan'})                            # "nan", "NaN", " NaN " (strip + casefold 后比较)
+_WS_RE = re.compile(r'\s+')
+_LEADING_NUM_RE = re.compile(r'^\s*[-+]?\.?\d')              # 以数字开头 (e.g. "10kg")
+
+def _try_float(s):
+    """float() 解析，失败返回 None (用于 to_numeric 不支持的写法)"""
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+def _normalize_header(name):
+    """表头标准化: "  Conc. (mg/ml) " -> "conc._(mg/ml)" """
+    return _WS_RE.sub('_', str(name).strip().lower())
+
 class DataCleaner:
     """
     BioDiagnosis 核心清洗器 (Opinionated Sanitizer)
@@ -14,11 +38,19 @@ class DataCleaner:
     "Dirty in, Clean out." 
     不询问用户，直接执行最严格的清洗标准。
     """
-
-    def __init__(self, df: pd.DataFrame, config: dict = None):
-        # 永远不要修改原始数据引用，创建深拷贝
-        self.df = df.copy()
+    # 列数达到此阈值时并行清洗 (窄表的线程调度开销大于收益)
+    PARALLEL_MIN_COLUMNS = 16
+    # 清洗规则版本: 任何会改变清洗结果 (取值/dtype) 的修改都必须递增，使旧的输入指纹缓存失效
+    VERSION = 2
+
+    def __init__(self, df: pd.DataFrame, config: dict = None, copy: bool = True):
+        # 永远不要修改原始数据引用，默认创建深拷贝
+        # copy=False: 调用方承诺不再使用该 DataFrame (省去一次整表复制)
+        # 各清洗步骤都通过重新赋值 self.df 产生新对象，不会原地修改调用方的数据
+        self.df = df.copy() if copy else df
         self.config = config or {}
+        # 原始表头 -> 清洗后表头 (由 _sanitize_headers 填充)
+        self._col_rename = {}
     
     def run(self) -> pd.DataFrame:
         """
@@ -51,25 +83,36 @@ class DataCleaner:
         # 尝试获取 Y 轴列名 (Wizard 模式下一定有)
         target_col = self.config.get('_mapping', {}).get('dependent_variable')
 
-        # 核心逻辑：如果是数值，则应用数学转换
-        def math_op(x):
-            try:
-                val = float(x)
-                if val <= 0: return np.nan
-                if model == 'log2': return np.log2(val)
-                if model == 'log10': return np.log10(val)
-                if model == 'ln': return np.log(val)
-            except:
-                return x
-            return x
+        # 核心逻辑：如果是数值，则应用数学转换 (向量化: 整列 to_numeric + NumPy ufunc)
+        # 非正数 -> NaN；无法解析为数字的单元格 (如 "Control") 保持原样
+        log_fn = {'log2': np.log2, 'log10': np.log10, 'ln': np.log}.get(model)
+        if log_fn is None:
+            logger.warning(f"Unknown model '{model}'. Data left untransformed.")
+
+        def transform(col):
+            if log_fn is None:
+                return col
+            vals = pd.to_numeric(col, errors='coerce')
+            arr = vals.to_numpy(dtype=np.float64, na_value=np.nan)
+            out = np.full_like(arr, np.nan)
+            log_fn(arr, out=out, where=arr > 0)
+            result = pd.Series(out, index=col.index, name=col.name)
+
+            unparsed = vals.isna() & col.notna()
+            if unparsed.any():
+                result = result.astype(object)
+                result[unparsed] = col[unparsed]
+                result = result.infer_objects()
+            return result
 
         if target_col and target_col in self.df.columns:
             logger.info(f'Targeting specifice column for transformation: {target_col}')
-            self.df[target_col] = self.df[target_col].map(math_op)
+            transformed = transform(self.df[target_col])
             
             # [Fix] Rename column to match config['ylabel'] which has suffix
+            # (重新赋值而非原地修改，保证 copy=False 时调用方的数据不变)
             new_col_name = f"{target_col} ({model})"
-            self.df.rename(columns={target_col: new_col_name}, inplace=True)
+            self.df = self.df.assign(**{target_col: transformed}).rename(columns={target_col: new_col_name})
             
             # Update mapping so downstream knows the new name is the target
             # self.config['_mapping']['dependent_variable'] = new_col_name 
@@ -81,8 +124,11 @@ class DataCleaner:
             self.config['_mapping']['dependent_variable'] = new_col_name
         else:
             logger.warning('Global transformation applied (Risky).')
-            # 对整个 DataFrame 应用转换（此时表头还没清洗，所以用 map）
-            self.df = self.df.map(math_op)
+            # 对整个 DataFrame 逐列应用转换（此时表头还没清洗）
+            if len(self.df.columns) > 0:
+                columns = self.df.columns
+                self.df = pd.concat([transform(col) for _, col in self.df.items()], axis=1)
+                self.df.columns = columns
     
     def _sanitize_headers(self):
         """
@@ -92,11 +138,9 @@ class DataCleaner:
         logger.debug("Sanitizing Headers...")
 
         # 转换为字符串 -> 去除首尾空格 -> 转小写 -> 把中间的空白变成下划线
-        self.df.columns = (self.df.columns
-                           .astype(str)
-                           .str.strip()
-                           .str.lower()
-                           .str.replace(r'\s+','_',regex=True))
+        # 一次性构建映射表并保存，供 _final_type_enforcement 直接查找 (避免两处逻辑漂移)
+        self._col_rename = {c: _normalize_header(c) for c in self.df.columns}
+        self.df = self.df.rename(columns=self._col_rename)
 
     def _sanitize_values(self):
         """
@@ -105,70 +149,100 @@ class DataCleaner:
         """
         logger.debug("Sanitizing Values (Regax Deep Clean)...")
 
-        # 预编译正则以提升性能 (Scientific Notation Supported)
-        # ^ : Start
-        # [-+]? : Optional Sign
-        # \d*\.?\d+ : Numbers (supports 10, 10.5, .5)
-        # ([eE][-+]?\d+)? : Optional Exponent (e-5, E+10)
-        num_pattern = re.compile(r'^([-+]?\d*\.?\d+([eE][-+]?\d+)?)')
+        # [Vectorized] 按列处理，使用 pandas 的 C 级字符串/数值内核，避免逐格调用 Python 函数
+        def clean_column(col):
+            # [Fast Path] 已经是数值列 (int/float)，统一为 float
+            if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+                return col.astype(float)
 
-        def clean_cell(x):
-            if pd.isna(x):
-                return x
-            
-            s = str(x).strip()
+            is_na = col.isna()
+            s = col.astype(str).str.strip()
+
+            # [Fast Path] 尝试直接整列转换
+            nums = pd.to_numeric(s, errors='coerce')
 
-            # [Opinionated] 处理生物学常见的 "Not Detected"
-            # 匹配 ND, N.D., nd, n.d.
-            if re.match(r'(?i)^n\.?d\.?$', s):
-                return np.nan
-
-            # [Fast Path] 尝试直接转换
-            try:
-                return float(s)
-            except ValueError:
-                pass
-                
             # [Unsafe Extraction] 尝试提取混杂文本中的数字
             # Example: "1.5 mg/mL" -> 1.5
             # Example: "1.2e-3 A.U." -> 0.0012
-            match = num_pattern.search(s)
-            if match:
-                try:
-                    return float(match.group(1))
-                except ValueError:
-                    return np.nan # 提取出的字符串仍无法转float (极罕见)
-            
+            pending = nums.isna() & ~is_na
+
+            # [Compat] float() 能解析而 to_numeric 不能的写法: "1_000", 非 ASCII 数字 ("٣", "１２")
+            # 只对这类候选格逐格回退到 float()，且必须在正则提取之前 (否则 "1_000" -> 1.0)
+            retry = pending & (s.str.contains('_', regex=False) | ~s.str.isascii())
+            if retry.any():
+                nums = nums.astype(float)
+                nums[retry] = s[retry].map(_try_float).astype(float)
+                pending = nums.isna() & ~is_na
+
+            if pending.any():
+                extracted = s[pending].str.extract(_NUM_RE, expand=False)
+                nums = nums.fillna(pd.to_numeric(extracted, errors='coerce'))
+
+            # [Opinionated] 处理生物学常见的 "Not Detected"
+            # 匹配 ND, N.D., nd, n.d.
+            # [Fix] 文本形式的 "nan" / "NaN" 也视为缺失值，否则会作为字符串残留导致整列变为 object
+            is_nd = (s.str.match(_ND_RE) | s.str.casefold().isin(_NAN_LITERALS)) & ~is_na
+
             # 如果都失败了，说明它是真正的文本 (如分组标签 "Control")
-            return s
-        
-        # Apply map (Performance Warning: 在大数据集上较慢，但为保证质量必须如此)
-        self.df = self.df.map(clean_cell)
+            is_text = nums.isna() & ~is_na & ~is_nd
+            # 与数值列 Fast Path 保持一致: 纯数字字符串列 ("1", "2") 同样统一为 float，而不是 int64
+            nums = nums.astype(float)
+            if not is_text.any() and not is_na.any():
+                return nums
+
+            cleaned = nums.astype(object)
+            cleaned[is_text] = s[is_text]
+            cleaned[is_na] = col[is_na]
+            return cleaned.infer_objects()
+
+        if len(self.df.columns) == 0:
+            return
+
+        columns = self.df.columns
+        series_list = [col for _, col in self.df.items()]
+
+        # [Data Parallel] 宽表 (生物数据常见数百个测量列): 各列独立，使用线程池并行清洗
+        # pandas 的 to_numeric / str 内核大部分时间在 C 层，线程即可获得加速
+        if len(series_list) >= self.PARALLEL_MIN_COLUMNS:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                cleaned = list(pool.map(clean_column, series_list))
+        else:
+            cleaned = [clean_column(col) for col in series_list]
+
+        self.df = pd.concat(cleaned, axis=1)
+        self.df.columns = columns
 
     def _auto_melt_strategy(self):
         """
         Auto-Melt (自动融合策略)
         判定是否为 Excel 宽表 (Wide Format)，如果是，强制转换为 Tidy Data (Long Format)。
         """
-        # [Heuristic Update 2.0] "Numeric Leaning" Strategy
-        # 即使被 Pandas 认为是 Object 列，只要其中大部分 (>50%) 是数字，就视为数值列。
-        def is_numeric_leaning(col):
-            if pd.api.types.is_numeric_dtype(col):
-                return True
-            # 尝试强制转换，计算有效数字比例
-            num_counts = pd.to_numeric(col, errors='coerce').notna().sum()
-            total_counts = len(col)
-            return (num_counts / total_counts) > 0.5 if total_counts > 0 else False
-
-        numeric_cols = [c for c in self.df.columns if is_numeric_leaning(self.df[c])]
-        object_cols = [c for c in self.df.columns if c not in numeric_cols]
-
         # [Scatter SKIP] 如果是散点图，通常需要 X vs Y 的宽表格式，跳过 Auto-Melt
+        # (提前判断，避免无意义的列类型扫描)
         graph_type = self.config.get('graph', '').lower()
         if 'scatter' in graph_type or 'heatmap' in graph_type:
             logger.info(f"Skipping Auto-Melt for {graph_type} graph (requires Wide Data).")
             return
 
+        # [Heuristic Update 2.0] "Numeric Leaning" Strategy
+        # 即使被 Pandas 认为是 Object 列，只要其中大部分 (>50%) 是数字，就视为数值列。
+        # 每列只做一次 to_numeric 转换并缓存结果 (数值列直接复用，不再转换)
+        coerced = {}
+        numeric_cols = []
+        object_cols = []
+        for c in self.df.columns:
+            col = self.df[c]
+            if pd.api.types.is_numeric_dtype(col):
+                is_numeric = True
+            else:
+                col = pd.to_numeric(col, errors='coerce')
+                is_numeric = len(col) > 0 and col.notna().mean() > 0.5
+            if is_numeric:
+                coerced[c] = col
+                numeric_cols.append(c)
+            else:
+                object_cols.append(c)
+
         # 只有当疑似数字列的数量是文本列的2倍以上，且没有明确的 'group' 列时，才认为是宽表。
         is_wide = (len(numeric_cols) > len(object_cols) * 2) and ('group' not in object_cols)
 
@@ -176,6 +250,10 @@ class DataCleaner:
             logger.info(f"Detecting Wide Data Format ({len(numeric_cols)} num vs {len(object_cols)} obj).") 
             logger.info("Initiating Auto-Melt...")
 
+            # 复用已转换的数值列 (Melt 后的 value 列本来也会被强制转为数字)
+            for c in numeric_cols:
+                self.df[c] = coerced[c]
+
             # 假设所有非数字列都是 ID 变量
             id_vars = list(object_cols)
             if not id_vars:
@@ -207,9 +285,8 @@ class DataCleaner:
         target_y = self.config.get('_mapping', {}).get('dependent_variable')
         if target_y:
             # 必须应用与 _sanitize_headers 相同的变换逻辑，才能找到列
-            # Lowercase + Spaces to Underscores
-            target_y_clean = str(target_y).strip().lower()
-            target_y_clean = re.sub(r'\s+', '_', target_y_clean)
+            # 优先查 _sanitize_headers 留下的映射表 (Lowercase + Spaces to Underscores)
+            target_y_clean = self._col_rename.get(target_y) or _normalize_header(target_y)
 
             if target_y_clean in self.df.columns:
                  # [Safety Fix] 只有当列看起来像数字时，才进行强制转换
@@ -226,7 +303,7 @@ class DataCleaner:
                         # 2. [Unit Support] Check if values start with numbers (e.g. 10kg)
                         valid_series = col.dropna().astype(str)
                         if len(valid_series) == 0: return False
-                        return valid_series.str.match(r'^\s*[-+]?\.?\d').mean() > 0.5
+                        return valid_series.str.match(_LEADING_NUM_RE).mean() > 0.5
                      except: return False
 
                  if is_transform or check_numeric(self.df[target_y_clean]):
@@ -235,14 +312,13 @@ class DataCleaner:
                      # 所以我们需要手动提取数字，再转换
                      
                      # 定义临时提取函数 (复用 _sanitize_values 逻辑)
-                     num_pattern = re.compile(r'^([-+]?\d*\.?\d+([eE][-+]?\d+)?)')
                      def extract_num(x):
                          s = str(x).strip()
                          # 尝试直接转
                          try: return float(s)
                          except: pass
                          # 尝试正则提取
-                         match = num_pattern.search(s)
+                         match = _NUM_RE.search(s)
                          if match:
                              try: return float(match.group(1))
                              except: pass
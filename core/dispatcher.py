@@ -1,8 +1,5 @@
 import logging
-from plugins.boxplot import BoxplotPlugin
-from plugins.scatter import ScatterPlugin
-from plugins.volcano import VolcanoPlugin
-from plugins.heatmap import HeatmapPlugin
+import importlib
 
 logger = logging.getLogger(__name__)
 
@@ -12,19 +9,34 @@ class PluginDispatcher:
     Maps config keywords to Plugin Classes.
     """
 
-    # 注册表：将用户可能的输入映射到类
+    # 注册表：将用户可能的输入映射到类 ("module:Class")
+    # [Lazy Registration] 插件模块 (seaborn/scipy) 只在被选中时才导入
     PLUGIN_MAP = {
-        'box': BoxplotPlugin,
-        'boxplot': BoxplotPlugin,
-        'scatter': ScatterPlugin,
-        'correlation': ScatterPlugin,
-        'volcano': VolcanoPlugin, # [NEW]
-        'heatmap': HeatmapPlugin  # [NEW]
+        'box': 'plugins.boxplot:BoxplotPlugin',
+        'boxplot': 'plugins.boxplot:BoxplotPlugin',
+        'scatter': 'plugins.scatter:ScatterPlugin',
+        'correlation': 'plugins.scatter:ScatterPlugin',
+        'volcano': 'plugins.volcano:VolcanoPlugin', # [NEW]
+        'heatmap': 'plugins.heatmap:HeatmapPlugin'  # [NEW]
     }
 
+    # 已解析的插件类缓存 (graph_type -> class)
+    _resolved = {}
+
     def __init__(self, artifact_manager):
         self.am = artifact_manager
 
+    @classmethod
+    def _resolve(cls, graph_type):
+        """按需导入插件类，未注册则返回 None"""
+        if graph_type not in cls._resolved:
+            target = cls.PLUGIN_MAP.get(graph_type)
+            if not target:
+                return None
+            mod_name, cls_name = target.split(':')
+            cls._resolved[graph_type] = getattr(importlib.import_module(mod_name), cls_name)
+        return cls._resolved[graph_type]
+
     def dispatch(self, config, df):
         """
         根据 config['graph'] 决定调用哪个插件
@@ -38,7 +50,7 @@ class PluginDispatcher:
             graph_type = 'box'
 
         # 3. 查表分发
-        plugins_cls = self.PLUGIN_MAP.get(graph_type)
+        plugins_cls = self._resolve(graph_type)
 
         if not plugins_cls:
             valid_keys = list(self.PLUGIN_MAP.keys())
@@ -1,4 +1,3 @@
-import re
 import pandas as pd
 from pathlib import Path
 import logging
@@ -39,22 +38,25 @@ class ForgivingParser:
                 
                 # Parse Key-Value pairs
                 # Example: "Graph: Box" or "graph = box"
-                # Split by first valid delimiter (: or =)
-                parts = re.split(r'[:=]', line, maxsplit=1)
-                if len(parts) == 2:
-                    key = self._normalize_key(parts[0])
-                    value = parts[1].strip()
-                    
-                    # [DSL] Check for mapping syntax: {ColumnName}
-                    if value.startswith('{') and value.endswith('}'):
-                        real_col = value[1:-1].strip()
-                        self.config['_mapping'][key] = real_col
-                        # Also store raw value for reference
-                        self.config[key] = real_col
-                    else:
-                        self.config[key] = value
-                else:
+                # Split by first valid delimiter (: or =) -- str.partition, no regex engine
+                colon, equals = line.find(':'), line.find('=')
+                if colon == -1 and equals == -1:
                     logger.warning(f"Skipping unparseable line: {line}")
+                    continue
+
+                delim = ':' if equals == -1 or (colon != -1 and colon < equals) else '='
+                raw_key, _, raw_value = line.partition(delim)
+                key = self._normalize_key(raw_key)
+                value = raw_value.strip()
+                
+                # [DSL] Check for mapping syntax: {ColumnName}
+                if value.startswith('{') and value.endswith('}'):
+                    real_col = value[1:-1].strip()
+                    self.config['_mapping'][key] = real_col
+                    # Also store raw value for reference
+                    self.config[key] = real_col
+                else:
+                    self.config[key] = value
                     
             return self.config, self.unsafe_flags
 
@@ -89,7 +91,7 @@ class ForgivingParser:
         
         try:
             # Basic loading fallback
-            if str(file_path).endswith('.csv'):
+            if str(file_path).lower().endswith('.csv'):
                 df = pd.read_csv(file_path)
             else:
                 df = pd.read_excel(file_path)
@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt 
 import matplotlib as m 
 import logging
 
@@ -13,17 +12,24 @@ class NatureStyler:
     Users don't get to choose fonts or sizes. We choose the best defaults for them.
     Reference: Nature Guide to Authors (Final artwork formatting).
     """
-    @staticmethod
-    def apply():
+    # rcParams 是进程级全局状态，应用一次即可 (main 启动时 + 每个插件 run 前都会调用)
+    _applied = False
+
+    @classmethod
+    def apply(cls):
         """
         Enforces Nature/Science publication standards.
         Strict typography (Arial), thin lines, and minimalist layout.
         """
+        if cls._applied:
+            return
+        cls._applied = True
         logger.info("Applying Nature Publication Style Standards")
 
         # 1. Font Strategy: Arial is King.
         # Fallback to Helvetica -> sans-serif if Arial is missing.
-        plt.rcParams.update({
+        # [Lazy Import] rcParams 与 pyplot 共享同一对象，这里不必加载 pyplot/backend
+        m.rcParams.update({
             # --- 1. Typography (Arial is King) ---
             'font.family': 'sans-serif',
             'font.sans-serif': ['Arial', 'Helvetica', 'DejaVu Sans'],
@@ -2,6 +2,14 @@ import sys
 
 BACK_SIGNAL = "__BACK__"
 
+def emit(*lines):
+    """
+    多行菜单/横幅一次性输出：
+    - 拼接为一个字符串，单次 write + flush (而不是每行一次 print)
+    """
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
 def get_user_input(prompt, allow_back=True):
     """
     全局输入处理器：
@@ -1,6 +1,6 @@
 import logging 
 import pandas as pd
-from core.utils import get_user_input, BACK_SIGNAL
+from core.utils import emit, BACK_SIGNAL
 from core.wizard_steps import WizardSteps
 
 logger = logging.getLogger(__name__)
@@ -17,42 +17,23 @@ class AnalysisWizard:
         self.steps_logic = WizardSteps(self)
 
     def run(self):
-        print("\n" + "="*40)
-        print(" BioData Interactive Wizard v1.1")
-        print("="*40)
+        emit("\n" + "="*40, " BioData Interactive Wizard v1.1", "="*40)
         
         config = {}
-        step = 1
-        
-        while step <= 4:
-            # Step Switcher
-            if step == 1:
-                # Step 1: Graph Selection
-                res = self.steps_logic.run_step_1(config)
-                if res == BACK_SIGNAL: return None # Exit Wizard
-                if res is False: continue # Stay on Step 1
-                step += 1
-            
-            elif step == 2:
-                # Step 2: Variable Mapping
-                res = self.steps_logic.run_step_2(config)
-                if res == BACK_SIGNAL: step -= 1; continue
-                step += 1
-
-            elif step == 3:
-                # Step 3: Transformation
-                res = self.steps_logic.run_step_3(config)
-                if res == BACK_SIGNAL: step -= 1; continue
-                step += 1
-
-            elif step == 4:
-                # Step 4: Metadata
-                res = self.steps_logic.run_step_4(config)
-                if res == BACK_SIGNAL: step -= 1; continue
-                step += 1
+        # [Step Table] 每一步都是 WizardSteps 的一个方法，按索引前进/后退
+        ws = self.steps_logic
+        steps = [ws.run_step_1, ws.run_step_2, ws.run_step_3, ws.run_step_4]
+        i = 0
+        while i < len(steps):
+            res = steps[i](config)
+            if res == BACK_SIGNAL:
+                if i == 0: return None # Exit Wizard
+                i -= 1
+            elif res is False:
+                continue # Stay on current step
+            else:
+                i += 1
 
-        print("\n" + "="*40)
-        print("Configuration captured! Ready to analyze.")
-        print("-"*40 + "\n")
+        emit("\n" + "="*40, "Configuration captured! Ready to analyze.", "-"*40 + "\n")
 
         return config
\ No newline at end of file
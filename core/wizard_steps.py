@@ -1,40 +1,73 @@
+import re
+import numpy as np
 import pandas as pd
-from core.utils import get_user_input, BACK_SIGNAL
+from core.utils import get_user_input, emit, BACK_SIGNAL
+
+# "Starts with a number" probe for unit-suffixed values (e.g. "10kg", " .5 mM")
+_NUMERIC_PREFIX_RE = re.compile(r'^\s*[-+]?\.?\d')
+_PREFIX_SAMPLE_SIZE = 1000
+
+# 跳过 Step 3 (数据转换) 的图表类型 / 切换到非 Heatmap 时需清除的残留键
+_SKIP_TRANSFORM = frozenset({'Volcano'})
+_HEATMAP_KEYS = ('heatmap_mode', 'z_score', 'cluster')
 
 class WizardSteps:
     """
     [Template Pattern] 
     Each step is a distinct method. 
-    Graph-specific sub-logic (like subtypes) is handled via `_resolve_subtype`.
+    Graph-specific sub-logic (like subtypes) is handled via `_handle_heatmap_subtype`.
     """
     def __init__(self, wizard_instance):
         self.wiz = wizard_instance
         self.df = wizard_instance.df
         self.columns = wizard_instance.columns
+        # [Infer Once] self.df 在向导生命周期内不变，构造时对每列分类一次
+        # 列名 -> 'numeric' | 'string' | 'mixed'
+        self._col_kind = {c: self._classify(series) for c, series in self.df.items()}
+        # 数值列 (原始列顺序)，供 Heatmap 'all' 直接使用
+        self._numeric_cols = [c for c, k in self._col_kind.items() if k == 'numeric']
+        self._columns_set = set(self.columns)
+        # 小写列名 -> 索引 (大小写不敏感查找；重名时保留第一个，与 list.index 一致)
+        self._col_index = {}
+        for i, c in enumerate(self.columns):
+            self._col_index.setdefault(str(c).lower(), i)
+        # 上次渲染预览表时的图表类型 (None = 尚未渲染)
+        self._preview_graph = None
 
-    def _get_subtypes(self, graph_type):
-        """
-        [Extensibility Point]
-        Return a dict of subtypes for a given graph type.
-        Structure: { "1": ("Description", "internal_value"), ... }
-        Return None if no subtypes exist.
-        """
-        if graph_type == "Heatmap":
-            return {
-                "1": ("Correlation Matrix (Sample-Sample Similarity)", "correlation"),
-                "2": ("Expression Heatmap (Raw Gene Values)", "expression")
-            }
-        
-        # [Reserved for Future] 
-        # You can easily add Violin plot support here:
-        # if graph_type == "Box":
-        #    return {
-        #        "1": ("Box Plot", "box"),
-        #        "2": ("Violin Plot", "violin")
-        #    }
-        
-        return None
+    @staticmethod
+    def _classify(series):
+        """Helper: semantic column kind ('numeric' / 'string' / 'mixed')"""
+        dt = series.dtype
+        # [Fast Path] 数值 dtype 直接判定，不碰数据
+        if pd.api.types.is_numeric_dtype(dt): return 'numeric'
+        if dt.kind in 'mM':
+            # datetime/timedelta: to_numeric 对所有非 NaT 值都成功
+            ratio = series.notna().mean()
+        else:
+            try:
+                if isinstance(dt, pd.CategoricalDtype):
+                    # 只转换类别本身，再按 codes 展开 (-1 = NaN 落到末尾的 False)
+                    cat_ok = np.append(pd.to_numeric(pd.Series(dt.categories), errors='coerce').notna().to_numpy(), False)
+                    codes = series.cat.codes.to_numpy()
+                    ratio = cat_ok[codes].mean() if len(codes) else 0.0
+                else:
+                    # object/string: 抽样前 1000 行
+                    ratio = pd.to_numeric(series.head(_PREFIX_SAMPLE_SIZE), errors='coerce').notna().mean()
+            except (TypeError, ValueError):
+                # e.g. 单元格里是 list/dict 等无法强转的对象
+                ratio = 0.0
+        if ratio > 0.5: return 'numeric'
+        # [Unit Support] e.g. "10 ug/ml": 只在前 1000 个非空值上做正则探测 (O(1) 而非 O(N))
+        sample = series.dropna().head(_PREFIX_SAMPLE_SIZE)
+        values = sample.astype(str).to_numpy()
+        if len(values) and sum(1 for v in values if _NUMERIC_PREFIX_RE.match(v)) / len(values) > 0.5:
+            return 'numeric'
+        kind = pd.api.types.infer_dtype(sample, skipna=True)
+        return 'string' if kind in ('string', 'empty') else 'mixed'
 
+    def _is_numeric_col(self, col_name):
+        """Helper: is_numeric (lookup into the classification built at construction)"""
+        return self._col_kind.get(col_name) == 'numeric'
 
     def get_valid_value(self, prompt):
         """Helper to get column index or name"""
@@ -54,9 +87,9 @@ class WizardSteps:
                 pass
             
             # 2. Try Column Name (Case-insensitive)
-            col_lower = [c.lower() for c in self.columns]
-            if val.lower() in col_lower:
-                return col_lower.index(val.lower())
+            idx = self._col_index.get(val.lower())
+            if idx is not None:
+                return idx
                 
             print("(!) Error: Please enter a valid index ID or column name.")
 
@@ -68,6 +101,8 @@ class WizardSteps:
         """
         keys = list(valid_map.keys())
         options_str = "/".join(keys)
+        # 大小写不敏感匹配表，每次调用只建一次 (而不是每次输入都重新 lower 一遍)
+        folded_keys = {k.casefold(): k for k in reversed(keys)}
         # Construct prompt like "Choice (1/2, Default 1)" if not provided
         
         while True:
@@ -90,11 +125,9 @@ class WizardSteps:
             # But the original code supported "box" for "1".
             
             # Let's support case-insensitive key interaction
-            if val.lower() in [k.lower() for k in keys]:
-                # find the actual key
-                for k in keys:
-                    if k.lower() == val.lower():
-                        return k, valid_map[k]
+            real_key = folded_keys.get(val.casefold())
+            if real_key is not None:
+                return real_key, valid_map[real_key]
             
             print(f"(!) Invalid choice. Please enter one of: {options_str}")
 
@@ -108,9 +141,9 @@ class WizardSteps:
         while step >= 0:
             # --- Step 0: Mode Selection ---
             if step == 0:
-                print("\n[Heatmap Mode]")
-                print(" [1] Correlation Matrix (Sample vs Sample similarity)")
-                print(" [2] Expression Heatmap (Gene vs Sample raw values)")
+                emit("\n[Heatmap Mode]",
+                     " [1] Correlation Matrix (Sample vs Sample similarity)",
+                     " [2] Expression Heatmap (Gene vs Sample raw values)")
                 
                 choice_map = {"1": "correlation", "2": "expression"}
                 res = self._get_valid_choice("Choice (1-2, Default 1)", choice_map, "1")
@@ -128,10 +161,10 @@ class WizardSteps:
             
             # --- Step 1: Normalization (Expression Only) ---
             elif step == 1:
-                print("\n[Normalization]")
-                print(" [0] None (Plot Raw Values)")
-                print(" [1] Z-Score Rows (Standardize Genes)")
-                print(" [2] Z-Score Columns (Standardize Samples)")
+                emit("\n[Normalization]",
+                     " [0] None (Plot Raw Values)",
+                     " [1] Z-Score Rows (Standardize Genes)",
+                     " [2] Z-Score Columns (Standardize Samples)")
                 
                 z_map = {"0": None, "1": 0, "2": 1}
                 z_res = self._get_valid_choice("Choice (0-2, Default 0)", z_map, "0")
@@ -162,11 +195,11 @@ class WizardSteps:
     def run_step_1(self, config):
         """Select Graph Type & Subtype"""
         while True:
-            print("\n[Step 1/4] Select Graph Type:")
-            print(" [1] Box Plot")
-            print(" [2] Scatter Plot")
-            print(" [3] Volcano Plot")
-            print(" [4] Heatmap")
+            emit("\n[Step 1/4] Select Graph Type:",
+                 " [1] Box Plot",
+                 " [2] Scatter Plot",
+                 " [3] Volcano Plot",
+                 " [4] Heatmap")
             
             graph_map = {"1":"Box","2":"Scatter","3":"Volcano","4":"Heatmap"}
             
@@ -183,9 +216,8 @@ class WizardSteps:
             
             # [Context Clear] Remove previous graph-specific keys to prevent residue
             if graph_selected != "Heatmap":
-                config.pop('heatmap_mode', None)
-                config.pop('z_score', None)
-                config.pop('cluster', None)
+                for k in _HEATMAP_KEYS:
+                    config.pop(k, None)
             
             # Subtype Logic
             if graph_selected == "Heatmap":
@@ -198,34 +230,33 @@ class WizardSteps:
     def run_step_2(self, config):
         """Variable Mapping"""
         graph_selected = config['graph']
-        print(f"\n[Step 2/4] Variable Mapping ({graph_selected})")
-        
+
         # Smart Data Preview
-        print(f"{'ID':<4} | {'Column Name':<25} | {'Type':<10} | {'Sample (First Value)':<20}")
-        print("-" * 70)
-        for i, col in enumerate(self.columns):
-            dtype = str(self.df[col].dtype)
-            sample = str(self.df[col].iloc[0])[:20]
-            print(f" {i:<3} | {col:<25} | {dtype:<10} | {sample:<20}")
-        print("-" * 70)
-        # Helper: is_numeric
-        def is_numeric_col(col_name):
-            try:
-                if pd.api.types.is_numeric_dtype(self.df[col_name]): return True
-                if pd.to_numeric(self.df[col_name], errors='coerce').notna().mean() > 0.5: return True
-                valid_series = self.df[col_name].dropna().astype(str)
-                if len(valid_series) == 0: return False
-                return valid_series.str.match(r'^\s*[-+]?\.?\d').mean() > 0.5
-            except:
-                return False
+        # [UX] 同一图表类型下回退重进 Step 2 时数据未变，不再重复整表输出
+        if self._preview_graph == graph_selected:
+            emit(f"\n[Step 2/4] Variable Mapping ({graph_selected})", "(preview above)")
+        else:
+            # [Vectorized] 一次取出 dtypes 与首行 (object 保持每列原始标量类型)，整表拼好后一次输出
+            dtypes = self.df.dtypes.to_numpy()
+            first_row = self.df.head(1).to_numpy(dtype=object)[0]
+            lines = [f"\n[Step 2/4] Variable Mapping ({graph_selected})",
+                     f"{'ID':<4} | {'Column Name':<25} | {'Type':<10} | {'Sample (First Value)':<20}", "-" * 70]
+            lines += [
+                f" {i:<3} | {col:<25} | {str(dt):<10} | {str(val)[:20]:<20}"
+                for i, (col, dt, val) in enumerate(zip(self.columns, dtypes, first_row))
+            ]
+            lines.append("-" * 70)
+            emit(*lines)
+            self._preview_graph = graph_selected
         # --- HEATMAP LOGIC ---
         if graph_selected == "Heatmap":
             mode = config.get('heatmap_mode', 'correlation')
-            print(f"\n[Heatmap: {mode.capitalize()}] Select numeric columns.")
-            print("Type column ID/Name. Tip: Type 'all' for all numeric, or '1-10' for range.")
-            print("Enter 'done' to finish. Type 'undo' to remove last. Type 'b' to go back/clear all.")
+            emit(f"\n[Heatmap: {mode.capitalize()}] Select numeric columns.",
+                 "Type column ID/Name. Tip: Type 'all' for all numeric, or '1-10' for range.",
+                 "Enter 'done' to finish. Type 'undo' to remove last. Type 'b' to go back/clear all.")
             
-            selected_cols = []
+            # 插入有序的 dict 当作有序集合：O(1) 去重，popitem() 即撤销最后一个
+            selected_cols = {}
             while True:
                 prompt = f"Select Column {len(selected_cols)+1} (or 'done')"
                 val_raw = get_user_input(prompt)
@@ -243,7 +274,7 @@ class WizardSteps:
                 # [UX Fix] 'undo' means Remove Last
                 if val.lower() == 'undo':
                      if selected_cols:
-                         removed = selected_cols.pop()
+                         removed = selected_cols.popitem()[0]
                          print(f"Removed '{removed}'.")
                      else:
                          print("Nothing to undo.")
@@ -261,48 +292,41 @@ class WizardSteps:
                 
                 # [Optimization] Support 'all' to select all available numeric columns
                 if val.lower() == 'all':
-                    added_count = 0
-                    for c in self.columns:
-                        if is_numeric_col(c) and c not in selected_cols:
-                            selected_cols.append(c)
-                            added_count += 1
-                    print(f"Added {added_count} new columns. Total: {len(selected_cols)}.")
+                    to_add = [c for c in self._numeric_cols if c not in selected_cols]
+                    selected_cols.update(dict.fromkeys(to_add))
+                    print(f"Added {len(to_add)} new columns. Total: {len(selected_cols)}.")
                     continue
 
                 # [Optimization] Support Range (e.g. 1-10)
-                if '-' in val and val.replace('-','').isdigit():
-                    try:
-                        start, end = map(int, val.split('-'))
-                        # Correct order
-                        if start > end: start, end = end, start
-                        
-                        added_count = 0
-                        for idx in range(start, end + 1):
-                            if 0 <= idx < len(self.columns):
-                                col_name = self.columns[idx]
-                                if is_numeric_col(col_name) and col_name not in selected_cols:
-                                    selected_cols.append(col_name)
-                                    added_count += 1
-                        print(f"Added {added_count} columns from range {start}-{end}.")
-                        continue
-                    except:
-                        pass # Fallback to normal check
+                # 单次 partition；"1-2-3"/"-5" 等不合法输入直接落到普通检查 (无需 try/except)
+                left, dash, right = val.partition('-')
+                if dash and left.isdecimal() and right.isdecimal():
+                    start, end = int(left), int(right)
+                    # Correct order
+                    if start > end: start, end = end, start
+                    
+                    # 切片自动截断越界部分；fromkeys 去掉重名列
+                    to_add = [c for c in dict.fromkeys(self.columns[start:end + 1])
+                              if self._is_numeric_col(c) and c not in selected_cols]
+                    selected_cols.update(dict.fromkeys(to_add))
+                    print(f"Added {len(to_add)} columns from range {start}-{end}.")
+                    continue
                 
                 # Check ID/Name
                 col_found = None
                 if val.isdigit() and 0 <= int(val) < len(self.columns):
                     col_found = self.columns[int(val)]
-                elif val in self.columns:
+                elif val in self._columns_set:
                      col_found = val
                 if not col_found:
-                    for c in self.columns:
-                        if c.lower() == val.lower():
-                            col_found = c; break
+                    idx = self._col_index.get(val.lower())
+                    if idx is not None:
+                        col_found = self.columns[idx]
                 
                 if col_found:
-                     if is_numeric_col(col_found):
+                     if self._is_numeric_col(col_found):
                          if col_found not in selected_cols:
-                             selected_cols.append(col_found)
+                             selected_cols[col_found] = None
                              print(f"Added: {col_found}")
                          else:
                              print("(!) Already selected.")
@@ -310,7 +334,7 @@ class WizardSteps:
                          print(f"(!) Column '{col_found}' is not numeric.")
                 else:
                      print("(!) Invalid column ID or Name.")
-            config['selected_columns'] = selected_cols
+            config['selected_columns'] = list(selected_cols)
             # Placeholders for compatibility
             config['xlabel'] = "Samples" 
             config['ylabel'] = "Genes/Variables"
@@ -327,7 +351,7 @@ class WizardSteps:
             if y_idx == BACK_SIGNAL: return BACK_SIGNAL
             
             col_name = self.columns[y_idx]
-            if is_numeric_col(col_name):
+            if self._is_numeric_col(col_name):
                 break
             else:
                 print(f" [Error] Column '{col_name}' is not numeric.")
@@ -345,13 +369,13 @@ class WizardSteps:
         # Let's only skip for Volcano for now if strictly needed, or just allow all.
         # Original logic skipped both.
         
-        if graph_selected in ['Volcano']:
+        if graph_selected in _SKIP_TRANSFORM:
              print(f"\n[Step 3/4] Data Transformation: Auto-skipped for {graph_selected}.")
              config['model'] = 'linear'
              return True
             
-        print("\n[Step 3/4] Data Transformation (Model):")
-        print(" [1] Linear | [2] Log2 | [3] Log10 | [4] Natural Log (Ln)")
+        emit("\n[Step 3/4] Data Transformation (Model):",
+             " [1] Linear | [2] Log2 | [3] Log10 | [4] Natural Log (Ln)")
         while True:
             t_raw = get_user_input("Choice (1-4, Default Linear)")
             if t_raw == BACK_SIGNAL: return BACK_SIGNAL
@@ -5,7 +5,10 @@ import logging
 import json
 from pathlib import Path
 import uuid
-import matplotlib.pyplot as plt
+
+# [Perf] 只保存图片、从不弹窗：pyplot 首次导入前固定用 Agg，跳过 Tk/Qt 等 GUI backend 的加载与探测
+# (setdefault：用户显式设置的 MPLBACKEND 仍然优先)
+os.environ.setdefault('MPLBACKEND', 'Agg')
 
 from core.parser import ForgivingParser
 from core.cleaner import DataCleaner
@@ -25,6 +28,23 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def _scan_dir(dirpath):
+    """
+    [Perf] 单次 os.scandir 扫描目录 (DirEntry 自带名字，无需逐个 stat / 构造 Path)
+    按后缀分桶返回 {'.xlsx': [...], '.csv': [...], '.bd': [...]}，跳过 Excel 临时文件 (~$)
+    """
+    buckets = {'.xlsx': [], '.csv': [], '.bd': []}
+    try:
+        with os.scandir(dirpath) as it:
+            for e in it:
+                if e.name.startswith('~$'): continue
+                bucket = buckets.get(os.path.splitext(e.name)[1].lower())
+                if bucket is not None:
+                    bucket.append(os.path.join(dirpath, e.name))
+    except FileNotFoundError:
+        pass
+    return buckets
+
 def setup_args():
     """定义 CLI 参数"""
     parser = argparse.ArgumentParser(description="BD-Core: Data Visualization Engine for Biological Science")
@@ -50,18 +70,19 @@ def main():
     try:
         while True:
             # --- 自动发现数据 (Data Discovery) ---
+            # 当前目录只扫描一次，数据文件与 .bd 配置共用同一次结果
+            root_files = _scan_dir('.')
             data_path = args.input
             is_interactive_selection = False # Flag to track if user was prompted for file selection
             
             if not data_path:
                 # [Smart Discovery] Scan for .xlsx/.csv, ignoring temp files (~$)
-                candidates = list(Path('.').glob('*.xlsx')) + list(Path('.').glob('*.csv'))
-                candidates = [f for f in candidates if not f.name.startswith('~$')]
+                candidates = root_files['.xlsx'] + root_files['.csv']
 
                 # [Smart Fallback] If no data in root, check 'test' folder
                 if not candidates:
-                    candidates = list(Path('test').glob('*.xlsx')) + list(Path('test').glob('*.csv'))
-                    candidates = [f for f in candidates if not f.name.startswith('~$')]
+                    test_files = _scan_dir('test')
+                    candidates = test_files['.xlsx'] + test_files['.csv']
 
                 if not candidates:
                     logger.error("No data file (.xlsl/.csv) found in current directory")
@@ -70,15 +91,15 @@ def main():
                     is_interactive_selection = True
                     print("\nMultiple data files detected:")
                     for i, f in enumerate(candidates):
-                        print(f" [{i}] {f.name}")
+                        print(f" [{i}] {os.path.basename(f)}")
                     try:
                         choice = int(get_user_input(f"Select data file (0-{len(candidates)-1}):", allow_back=False))
-                        data_path = candidates[choice]
+                        data_path = Path(candidates[choice])
                     except (ValueError, IndexError):
                         logger.error("Invalid selection. Exiting.")
                         break # Exit loop to trigger finally
                 else:
-                    data_path = candidates[0]
+                    data_path = Path(candidates[0])
                 
                 logger.info(f"Auto-detected data: {data_path}")
 
@@ -96,9 +117,9 @@ def main():
                 config, _ = parser.parse()
             else:
                 # 尝试自动寻找 .bd 文件 (测试后门)
-                bd_files = list(Path('.').glob('*.bd'))
+                bd_files = root_files['.bd']
                 if bd_files:
-                    config_path = bd_files[0]
+                    config_path = Path(bd_files[0])
                     parser = ForgivingParser(config_path)
                     config, _ = parser.parse()
                 else:
@@ -128,23 +149,26 @@ def main():
                 '''
             # [UX Fix] 自动修正 Y轴 标签以反映转换
             model = config.get('model','linear')
-            if model != 'linear' and config.get('ylabel'):
+            ylabel = config.get('ylabel')
+            if model != 'linear' and ylabel:
                 # [Critical Fix] Preserve original column name for Cleaner/Mapper
                 if '_mapping' not in config: config['_mapping'] = {}
-                config['_mapping']['dependent_variable'] = config['ylabel']
+                config['_mapping']['dependent_variable'] = ylabel
                 
-                config['ylabel'] = f"{config['ylabel']} ({model})"
+                config['ylabel'] = f"{ylabel} ({model})"
 
             # --- 4. 清洗与转换 pipeline ---
-            cleaner = DataCleaner(raw_df, config)
+            # raw_df 之后不再使用，交给 Cleaner 独占 (免去整表复制)
+            cleaner = DataCleaner(raw_df, config, copy=False)
             clean_df = cleaner.run()
     
             # --- 5. 环境初始化 (Initialization) ---
             # 生成唯一的 RunID，创建沙箱文件夹
             # 计算输入数据的 SHA256 指纹，确保实验可复现 (Reproducibility)
-            run_id = str(uuid.uuid4())[:8]
+            # (源文件与配置都未变时复用 .bd_cache 中的上次结果)
+            run_id = uuid.uuid4().hex[:8]
             am = ArtifactManager(run_id, config)
-            am.calculate_input_hash(config, clean_df)
+            am.calculate_input_hash(config, clean_df, source_path=data_path)
 
             # --- 6. 分发 (Dispatching) ---
             # 将清洗后的数据交给 Dispatcher，由它唤醒对应的 Plugin (如 Boxplot)
@@ -1,9 +1,9 @@
 import seaborn as sns 
 import matplotlib.pyplot as plt
 from scipy import stats
+import numpy as np
 import pandas as pd
-import textwrap
-from plugins.base import BasePlugin
+from plugins.base import BasePlugin, _wrap_text
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,6 +12,7 @@ class BoxplotPlugin(BasePlugin):
     """
     MVP Plugin: Boxplot + Stripplot with Auto-Stats.
     """
+    STATS_COLUMNS = ("Comparison", "Method", "P-Value", "Control_N", "Test_N")
 
     def validate_data(self):
         """Ensure 'x' (Group) and 'y' (Value) columns exist."""
@@ -31,6 +32,8 @@ class BoxplotPlugin(BasePlugin):
 
         # Remove NaNs
         self.df = self.df.dropna(subset=['y'])
+        # 统计检验直接用 ndarray (与 self.df 行顺序对齐，compute_stats 按它取分组行号)
+        self._y = self.df['y'].to_numpy()
         logger.info(f"Data Validated. Rows: {len(self.df)}")
 
     def compute_stats(self):
@@ -64,31 +67,35 @@ class BoxplotPlugin(BasePlugin):
         others = [g for g in groups if g != ref_group]
         self.order = [ref_group] + others
 
-        # [HYGIENE] Enforce Data Sorting (Control First)
-        # Convert to categorical to ensure groupby/export respects this order
+        # 每组行号与 validate_data 缓存的 self._y 对齐
+        idx_map = self.df.groupby('x', sort=False).indices
+
+        # [HYGIENE] Control First
+        # Categorical 的类别顺序即 Control 优先：groupby / 绘图 (order=) 都按它排列，
+        # 不再对整表 sort_values (O(N log N) + 整表复制)，导出的数据保持原始行顺序
         self.df['x'] = pd.Categorical(self.df['x'], categories=self.order, ordered=True)
-        self.df = self.df.sort_values('x')
 
         # 3. Pairwise Tests (Treatment vs Control)
-        control_data = self.df[self.df['x'] == ref_group]['y']
+        # 按组行号切片 numpy 数组 (不再每组整表布尔过滤)
+        y_vals = self._y
+        empty = np.array([], dtype=np.intp)
+        control_data = y_vals[idx_map.get(ref_group, empty)]
+
+        # 对照组的 Shapiro 检验与实验组无关，只算一次 (None = 样本太少/常数组/检验失败)
+        p_ctrl = self._shapiro_p(control_data)
+        # 对照组的 n / 均值 / 平方和同理只算一次，T-test 分支直接复用
+        ctrl_moments = self._moments(control_data)
         
         results_list = []
         for test_group in others:
-            test_data = self.df[self.df['x'] == test_group]['y']
+            test_data = y_vals[idx_map.get(test_group, empty)]
             
             # Normality Check (Simplified)
-            try:
-                if len(control_data) >= 3 and len(test_data) >= 3:
-                     _, p1 = stats.shapiro(control_data)
-                     _, p2 = stats.shapiro(test_data)
-                     is_normal = (p1 > 0.05) and (p2 > 0.05)
-                else:
-                     is_normal = False # Fallback for small N
-            except:
-                is_normal = False
+            p_test = self._shapiro_p(test_data) if p_ctrl is not None else None
+            is_normal = p_test is not None and (p_ctrl > 0.05) and (p_test > 0.05)
                 
             if is_normal:
-                stat, p_val = stats.ttest_ind(test_data, control_data)
+                p_val = self._student_t_p(self._moments(test_data), ctrl_moments)
                 method = "T-test"
             else:
                 stat, p_val = stats.mannwhitneyu(test_data, control_data,)
@@ -109,6 +116,41 @@ class BoxplotPlugin(BasePlugin):
         # If stats_results is a list of dicts, pd.DataFrame(self.stats_results) works perfectly!
         self.stats_results = results_list
 
+    @staticmethod
+    def _moments(arr):
+        """
+        (n, 均值, 离差平方和)，供 _student_t_p 使用
+        """
+        n = arr.size
+        mean = arr.mean()
+        return n, mean, float(np.dot(arr - mean, arr - mean))
+
+    @staticmethod
+    def _student_t_p(a, b):
+        """
+        [Perf] 与 stats.ttest_ind(equal_var=True) 相同的双侧 p 值，直接由两组矩计算，
+        省去每次比较的 scipy 参数校验/广播开销。调用方保证两组 N >= 3 且非常数 (已通过 Shapiro)。
+        """
+        n1, m1, ss1 = a
+        n2, m2, ss2 = b
+        df = n1 + n2 - 2
+        pooled_var = (ss1 + ss2) / df
+        t = (m1 - m2) / np.sqrt(pooled_var * (1.0 / n1 + 1.0 / n2))
+        return float(2.0 * stats.t.sf(abs(t), df))
+
+    @staticmethod
+    def _shapiro_p(arr):
+        """
+        Shapiro-Wilk p 值；N < 3 或常数组 (极差为 0，检验无意义) 直接返回 None，不跑检验
+        """
+        try:
+            if arr.size < 3 or np.ptp(arr) == 0:
+                return None
+            _, p = stats.shapiro(arr)
+            return p
+        except (ValueError, TypeError, FloatingPointError):
+            return None
+
     def plot(self):
         """
         [Visual Logic] 1. Logic Sorting
@@ -117,11 +159,23 @@ class BoxplotPlugin(BasePlugin):
         """
         # [Fix] Smart Wrap helper
         def smart_wrap(text, width=20):
-            return "\n".join(textwrap.wrap(str(text), width=width))
+            return _wrap_text(str(text), width)
 
         # 1. Prepare Data Labels (Wrap text to avoid overflow)
         # We must modify the dataframe itself so Seaborn picks up the wrapped labels
-        self.df['x'] = self.df['x'].apply(lambda x: smart_wrap(x, width=15))
+        # [Perf] compute_stats 已把 x 设为 Categorical：只对 k 个类别做 textwrap，而不是 N 行逐个 apply
+        x_col = self.df['x']
+        if isinstance(x_col.dtype, pd.CategoricalDtype):
+            cats = x_col.cat.categories
+            wrapped = [smart_wrap(c, width=15) for c in cats]
+            if len(set(wrapped)) == len(wrapped):
+                self.df['x'] = x_col.cat.rename_categories(wrapped)
+            else:
+                # 折行后标签撞车 (rename_categories 要求唯一)，退回逐值映射
+                wrap_map = dict(zip(cats, wrapped))
+                self.df['x'] = x_col.map(wrap_map).astype(object)
+        else:
+            self.df['x'] = x_col.map(lambda x: smart_wrap(x, width=15))
         
         # Re-sort groups based on the wrapped text (preserving logic order)
         # Note: compute_stats already set 'x' as Categorical with specific order.
@@ -150,18 +204,26 @@ class BoxplotPlugin(BasePlugin):
         )
 
         #Stripplot (The raw points)
-        sns.stripplot(
-            data=self.df, x="x", y="y",
-            color="black", size=3, alpha=0.6, jitter=0.2,
-            zorder=2,
-            ax=self.ax
+        # [Perf] 等价于 sns.stripplot(color="black", size=3, alpha=0.6, jitter=0.2)，
+        # 但预先算好抖动后的位置，一次 ax.scatter 画完 (1 个 PathCollection 而不是每组一个)
+        pos = pd.Categorical(self.df['x'], categories=plot_order).codes  # 箱体位置 = plot_order 下标
+        on_axis = pos >= 0
+        pos = pos[on_axis]
+        jitter = np.random.default_rng(0).uniform(-0.2, 0.2, pos.size)
+        jitter[np.bincount(pos, minlength=len(plot_order))[pos] == 1] = 0  # 与 seaborn 一致：单点组不抖动
+        self.ax.scatter(
+            pos + jitter, self.df['y'].to_numpy()[on_axis],
+            s=3 ** 2, color="black", alpha=0.6, linewidth=0,
+            zorder=2
         )
+        # scatter 会触发 x 轴自动缩放；恢复 seaborn 的类别轴范围 (stripplot 结束时同样会设置)
+        self.ax.set_xlim(-.5, len(plot_order) - .5, auto=None)
 
         # [Title & Legend Fix]
         # 1. Title
         title = self.config.get('title')
         if title:
-             wrapped_title = "\n".join(textwrap.wrap(title, width=50))
+             wrapped_title = _wrap_text(title, 50)
              self.ax.set_title(wrapped_title, fontsize=12, pad=15)
         
         # 2. Legend
@@ -182,7 +244,7 @@ class BoxplotPlugin(BasePlugin):
         if show_legend and handles:
              legend_title = self.config.get('legend_name') or self.config.get('xlabel') or "Group"
              # [Smart Wrap] Wrap legend title
-             wrapped_leg_title = "\n".join(textwrap.wrap(legend_title, width=20))
+             wrapped_leg_title = _wrap_text(legend_title, 20)
              
              # Move legend outside to prevent covering data
              self.ax.legend(handles=handles, labels=labels, title=wrapped_leg_title, 
@@ -1,14 +1,71 @@
 import seaborn as sns
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-from plugins.base import BasePlugin
+from plugins.base import BasePlugin, _acquire_fig
+
+
+# 表头/索引清洗：去掉所有 \r \n \t (含单元格内换行)，str.translate 一次 C 级扫描，不走正则
+_STRIP_TBL = str.maketrans('', '', '\r\n\t')
+
+def _clean_label(label):
+    return str(label).translate(_STRIP_TBL).strip()
+
+
+def _pearson_matrix(X, labels):
+    """
+    [BLAS Fast Path] 无缺失值的 float64 矩阵 X：Pearson 矩阵 = 标准化后的 X.T @ X / (n-1)，一次 GEMM 完成。
+    行数不足 2 时返回 None
+    """
+    if X.shape[0] < 2:
+        return None
+
+    Xc = X - X.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 常数列 std=0 -> NaN，与 pandas 一致
+        Xc /= Xc.std(axis=0, ddof=1)
+        C = (Xc.T @ Xc) / (X.shape[0] - 1)
+    np.clip(C, -1.0, 1.0, out=C)
+    # C 是本函数新分配的数组，copy=False 直接包装 (pandas 3 默认会再复制一份 ndarray)
+    return pd.DataFrame(C, index=labels, columns=labels, copy=False)
+
+def _pearson_p_values(corr, n):
+    """
+    [Vectorized] 由 r 矩阵闭式求双侧 p 值 (与 stats.pearsonr 相同)：t = r·sqrt((n-2)/(1-r²))，p = 2·t.sf(|t|, n-2)。
+    矩阵对称，只算上三角 (i < j) 再镜像，t.sf 调用量减半；对角线记为 0，r 为 NaN (常数列) 时 p 也为 NaN。
+    """
+    from scipy import stats
+
+    R = corr.to_numpy(dtype=np.float64)
+    iu = np.triu_indices(R.shape[0], k=1)
+    r = R[iu]
+    if n < 2:
+        p = np.full(r.shape, np.nan)
+    elif n == 2:
+        # 两点必然完全相关，pearsonr 约定 p = 1
+        p = np.where(np.isnan(r), np.nan, 1.0)
+    else:
+        df = n - 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = r * np.sqrt(df / (1.0 - r * r))  # |r| = 1 -> inf -> p = 0
+        p = 2.0 * stats.t.sf(np.abs(t), df)
+
+    P = np.zeros(R.shape)
+    P[iu] = p
+    P += P.T
+    return pd.DataFrame(P, index=corr.index, columns=corr.columns, copy=False)
 
 class HeatmapPlugin(BasePlugin):
     """
     Heatmap: Supports 'correlation' (default) and 'expression' modes.
     """
+    USES_OWN_FIGURE = True
+
+    # [Cache] 进程内的聚类 linkage 缓存：同一份数据 (+ z_score/metric/method) 重复出图时
+    # 直接把上次的 row/col linkage 传给 clustermap，跳过 O(N²) 距离矩阵与层次聚类
+    _LINKAGE_CACHE = {}
+    _LINKAGE_CACHE_SIZE = 8
     def validate_data(self):
-        self.numeric_cols = self.df.select_dtypes(include=['number']).columns
+        self.numeric_cols = self.df.columns[self._numeric_positions()]
         if len(self.numeric_cols) < 2:
             raise ValueError("Heatmap requires at least 2 numeric columns.")
 
@@ -16,60 +73,70 @@ class HeatmapPlugin(BasePlugin):
         # [Sanitization v1.2] Clean Dataframe IMMEDIATELY
         # Strip whitespace/newlines AND internal newlines (e.g. from Excel copy-paste)
         try:
-            self.df.index = self.df.index.astype(str).str.replace(r'[\r\n\t]', '', regex=True).str.strip()
-            self.df.columns = self.df.columns.astype(str).str.replace(r'[\r\n\t]', '', regex=True).str.strip()
+            self.df.index = pd.Index([_clean_label(i) for i in self.df.index], name=self.df.index.name)
+            self.df.columns = pd.Index([_clean_label(c) for c in self.df.columns], name=self.df.columns.name)
         except Exception:
             pass 
 
         # 1. Determine columns to use
         if self.config.get('selected_columns'):
             # Also clean the user's requested columns to match the clean DF
-            cols_to_use = [str(c).replace('\r','').replace('\n','').replace('\t','').strip() for c in self.config['selected_columns']]
+            cols_to_use = [_clean_label(c) for c in self.config['selected_columns']]
         else:
-            # Fallback
-            cols_to_use = [c for c in self.numeric_cols if c not in ['x','y']]
+            # Fallback (numeric_cols 取自清洗前的表头，同样清洗后再匹配)
+            cols_to_use = [_clean_label(c) for c in self.numeric_cols if c not in ['x','y']]
 
         # [Fix] Case-insensitive matching for columns
-        clean_cols = [c.lower() for c in self.df.columns]
+        # 列名集合 + 小写 -> 首个同名列 的字典各建一次，每个请求列 O(1) 查找
+        col_set = set(self.df.columns)
+        lower_map = {}
+        for c in self.df.columns:
+            lower_map.setdefault(c.lower(), c)
         self.valid_cols = []
         for user_col in cols_to_use:
             # Try exact match
-            if user_col in self.df.columns:
+            if user_col in col_set:
                 self.valid_cols.append(user_col)
             # Try lower match
-            elif user_col.lower() in clean_cols:
-                 idx = clean_cols.index(user_col.lower())
-                 self.valid_cols.append(self.df.columns[idx])
+            elif user_col.lower() in lower_map:
+                 self.valid_cols.append(lower_map[user_col.lower()])
         
         # Get subtype (default to correlation if missing)
         self.subtype = self.config.get('subtype', self.config.get('heatmap_mode', 'correlation'))
         # 2. Compute Data based on Subtype
         if self.subtype == 'correlation':
             # Mode A: Correlation Matrix (Values -1 to 1)
-            self.heatmap_data = self.df[self.valid_cols].corr()
-            
+            subset = self.df[self.valid_cols]
+            # 只物化一次 float64 矩阵：热图的 r 与 p 值共用 (p 值按整行剔除缺失后的数据计算)
+            try:
+                X = subset.to_numpy(dtype=np.float64)
+            except (TypeError, ValueError):
+                X = None
+
+            if X is None:
+                # 非数值列：交给 pandas 处理 (与原逻辑一致)
+                self.heatmap_data = subset.corr()
+                data_values = subset.dropna()
+                n_complete = len(data_values)
+                corr_complete = data_values.corr()
+            else:
+                complete = ~np.isnan(X).any(axis=1)
+                n_complete = int(complete.sum())
+                no_missing = n_complete == len(X)
+                corr_complete = _pearson_matrix(X if no_missing else X[complete], subset.columns)
+                if no_missing and corr_complete is not None:
+                    # 无缺失值：GEMM 结果就是热图矩阵，直接复用
+                    self.heatmap_data = corr_complete
+                else:
+                    # 有缺失值：热图保持 DataFrame.corr() 的逐对剔除语义
+                    self.heatmap_data = subset.corr()
+                if corr_complete is None:
+                    corr_complete = self.heatmap_data  # 完整行不足 2，p 值全为 NaN，只需要形状
+
             # [Statistics] Calculate P-values for Correlation
             # We need a dataframe of p-values matching the corr matrix
-            import scipy.stats as stats
-            df_corr = self.heatmap_data
-            p_values = pd.DataFrame(index=df_corr.index, columns=df_corr.columns, dtype=float)
-            
-            # Efficiently calculate pairwise p-values
-            # Note: This is O(N^2), might be slow for huge N, but N=50 is fine.
-            data_values = self.df[self.valid_cols].dropna() 
-            
-            for c1 in df_corr.columns:
-                for c2 in df_corr.columns:
-                     if c1 == c2:
-                         p_values.loc[c1, c2] = 0.0 # Identity
-                     else:
-                         # Pearsonr returns (r, p)
-                         try:
-                            _, p = stats.pearsonr(data_values[c1], data_values[c2])
-                            p_values.loc[c1, c2] = p
-                         except:
-                            p_values.loc[c1, c2] = np.nan
-                            
+            p_values = _pearson_p_values(corr_complete, n_complete)
+
             # Store for BasePlugin to save/star
             # We flatten it or keep it as matrix? BasePlugin expects list of dicts or DataFrame.
             # BasePlugin.save_artifacts -> stats_df = pd.DataFrame(self.stats_results)
@@ -91,6 +158,23 @@ class HeatmapPlugin(BasePlugin):
             # No simple p-value for raw expression without defined groups.
             self.stats_results = {} # Clear previous if any
             
+    @staticmethod
+    def _linkage_key(values, z_score, metric, method):
+        """绘图矩阵 (float64 ndarray) 的内容指纹 + 聚类参数"""
+        import hashlib
+
+        values = np.ascontiguousarray(values)
+        digest = hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+        return (values.shape, digest, z_score, metric, method)
+
+    def _store_linkage(self, key):
+        """记录 clustermap 刚算出的 linkage；超过上限时丢弃最早的条目"""
+        cache = self._LINKAGE_CACHE
+        cache[key] = (self.cluster_grid.dendrogram_row.linkage,
+                      self.cluster_grid.dendrogram_col.linkage)
+        while len(cache) > self._LINKAGE_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+
     def plot(self):
         # 3. Configure Plot
         # [Nature Standard]
@@ -119,17 +203,29 @@ class HeatmapPlugin(BasePlugin):
         # sns.clustermap creates its own Figure/Axes grid.
         # We must attach it to self.fig if possible, or handle the figure object it returns.
         
-        # Close the base-class created figure since Clustermap makes a new one
-        plt.close(self.fig) 
+        # Clustermap makes its own Figure (USES_OWN_FIGURE)，基类不再预先分配画布
         
         try:
             # Handle NaN safely (Clustermap crashes on NaN)
-            if data.isnull().values.any():
+            # 只物化一次 float64 矩阵 (NaN 检查与 linkage 指纹共用)；
+            # NaN 检查用 np.sum 单遍归约，不分配整块布尔掩码 (inf - inf 的误报只会多一次无害的 fillna)
+            try:
+                values = data.to_numpy(dtype=np.float64)
+            except (TypeError, ValueError):
+                values = None
+            has_nan = np.isnan(values.sum()) if values is not None else data.isnull().values.any()
+            if has_nan:
                 data = data.fillna(0) # Simple fallback
+                if values is not None:
+                    values = np.nan_to_num(values, nan=0.0, posinf=np.inf, neginf=-np.inf)
 
             # [Clustering Control]
             # Default to True (Nature standard). User can opt-out to preserve order.
             do_cluster = self.config.get('cluster', True)
+
+            linkage_key = self._linkage_key(values, z_score, metric, method) if do_cluster and values is not None else None
+            cached = self._LINKAGE_CACHE.get(linkage_key) if linkage_key else None
+            linkage_kws = {'row_linkage': cached[0], 'col_linkage': cached[1]} if cached else {}
             
             self.cluster_grid = sns.clustermap(
                 data,
@@ -142,8 +238,11 @@ class HeatmapPlugin(BasePlugin):
                 dendrogram_ratio=(.1 if do_cluster else 0, .2 if do_cluster else 0),
                 cbar_pos=(0.02, 0.8, 0.03, 0.18), # Move colorbar to left
                 col_cluster=do_cluster,
-                row_cluster=do_cluster
+                row_cluster=do_cluster,
+                **linkage_kws
             )
+            if linkage_key and not cached:
+                self._store_linkage(linkage_key)
             
             # Re-assign self.fig and self.ax for downstream saving/stamping
             self.fig = self.cluster_grid.fig
@@ -160,7 +259,7 @@ class HeatmapPlugin(BasePlugin):
         except Exception as e:
             # Fallback to standard Heatmap if clustering fails (e.g. single row/col)
             # logger.warning(f"Clustermap failed ({e}), falling back to standard Heatmap.")
-            self.fig, self.ax = plt.subplots(figsize=(8, 6))
+            self.fig, self.ax = _acquire_fig((8, 6))
             
             # Recalculate basic params for fallback
             annot = True if len(data) < 20 else False
@@ -1,10 +1,10 @@
-import seaborn as sns
 import matplotlib.pyplot as plt 
 from scipy import stats
-from plugins.base import BasePlugin
+from plugins.base import BasePlugin, _wrap_text
 import logging
+import numpy as np
 import pandas as pd
-import textwrap
+from pandas.api.types import is_numeric_dtype
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +12,7 @@ class ScatterPlugin(BasePlugin):
     """
     MVP Plugin: Scatter Plot with Linear Regression.
     """
+    STATS_COLUMNS = ("Pearson_r", "R_Squared", "P-Value", "N")
 
     def validate_data(self):
         """Ensure 'x' and 'y' columns exist."""
@@ -21,24 +22,29 @@ class ScatterPlugin(BasePlugin):
             raise ValueError(f"Scatter requires columns: {missing}")
 
         # Enforce numeric types (coerce strings like '48h', 'ND' to NaN)
-        self.df['x'] = pd.to_numeric(self.df['x'], errors='coerce')
-        self.df['y'] = pd.to_numeric(self.df['y'], errors='coerce')
-
-        self.df = self.df.dropna(subset=['x','y'])
+        # 已是数值列 (cleaner 输出的常见情况) 时跳过 to_numeric 的逐值解析
+        for col in ('x', 'y'):
+            if not is_numeric_dtype(self.df[col]):
+                self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
+
+        # 一个布尔掩码剔除 x/y 缺失行；没有缺失时保留原表
+        keep = self.df['x'].notna().to_numpy() & self.df['y'].notna().to_numpy()
+        if not keep.all():
+            self.df = self.df[keep]
         logger.info(f"Data Validated. Rows: {len(self.df)}")
 
     def compute_stats(self):
         """
         Pearson Correlation + Linear Regression Stats
         """
-        x = self.df['x']
-        y = self.df['y']
+        x = self.df['x'].to_numpy(dtype=float)
+        y = self.df['y'].to_numpy(dtype=float)
 
         if len(x) < 2:
             return
 
         # Pearson Correlation
-        r, p_val = stats.pearsonr(x, y)
+        r, p_val = self._pearson(x, y)
         r_squared = r ** 2
 
         logger.info(f"Correlation: R^2={r_squared:.4f}, p={p_val:.4e}")
@@ -50,6 +56,54 @@ class ScatterPlugin(BasePlugin):
             "N": len(x)
         }
 
+    @staticmethod
+    def _pearson(x, y):
+        """
+        [Perf] 闭式 Pearson r 与双侧 p 值 (与 stats.pearsonr 相同)，省去 scipy 的输入校验/结果对象开销。
+        常数列 -> (nan, nan)；N == 2 时 p = 1 (两点必然共线)
+        """
+        xm = x - x.mean()
+        ym = y - y.mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.dot(xm, ym) / np.sqrt(np.dot(xm, xm) * np.dot(ym, ym))
+        if np.isnan(r):
+            return r, np.nan
+        r = min(max(r, -1.0), 1.0)
+
+        n = len(x)
+        if n == 2:
+            return r, 1.0
+        df = n - 2
+        with np.errstate(divide='ignore'):
+            t = r * np.sqrt(df / (1.0 - r * r))  # |r| = 1 -> inf -> p = 0
+        return r, 2.0 * stats.t.sf(abs(t), df)
+
+    def _draw_fit(self, x, y, ci=95):
+        """
+        回归线 + ci% 置信带 (Shaded)：yhat ± t(n-2) · sqrt(MSE · (1/n + (x0 - x̄)² / Sxx))
+        网格与 seaborn 相同 (数据范围内 100 个点)；N < 2 或 x 无变化时不画线，N == 2 时只画线
+        """
+        n = len(x)
+        if n < 2:
+            return
+        x_bar, y_bar = x.mean(), y.mean()
+        xc = x - x_bar
+        sxx = np.dot(xc, xc)
+        if sxx == 0:
+            return
+        slope = np.dot(xc, y - y_bar) / sxx
+        intercept = y_bar - slope * x_bar
+
+        grid = np.linspace(x.min(), x.max(), 100)
+        yhat = intercept + slope * grid
+        self.ax.plot(grid, yhat, color='red', linewidth=1)
+
+        if n > 2:
+            resid = y - (intercept + slope * x)
+            mse = np.dot(resid, resid) / (n - 2)
+            half_width = stats.t.ppf(0.5 + ci / 200, n - 2) * np.sqrt(mse * (1.0 / n + (grid - x_bar) ** 2 / sxx))
+            self.ax.fill_between(grid, yhat - half_width, yhat + half_width, facecolor='red', alpha=.15)
+
     def plot(self):
         """
         Visual: Points + Regression Line + 95% CI
@@ -57,19 +111,21 @@ class ScatterPlugin(BasePlugin):
         # [Fix] Smart Title Wrap
         title = self.config.get('title')
         if title:
-             wrapped_title = "\n".join(textwrap.wrap(title, width=50))
+             wrapped_title = _wrap_text(title, 50)
              self.ax.set_title(wrapped_title, fontsize=12, pad=15)
         
         # Main Plot
-        sns.regplot(
-            data=self.df, x='x', y='y',
+        # [Perf] 不再用 sns.regplot(ci=95)：它用 1000 次 bootstrap 估计置信带。
+        # 这里用 OLS 的解析 95% CI (均值响应)，外观参数与原 regplot 调用一致
+        x = self.df['x'].to_numpy(dtype=float)
+        y = self.df['y'].to_numpy(dtype=float)
+        self.ax.scatter(
+            x, y,
             color='black', # Points color
-            scatter_kws={'s': 10, 'alpha': 0.6},
-            line_kws={'color':'red','linewidth':1},
-            ci=95, # 95% Confidence Interval (Shaded)
-            ax=self.ax,
+            s=10, alpha=0.6, linewidths=plt.rcParams['lines.markeredgewidth'],
             label="Data" # Default label
         )
+        self._draw_fit(x, y)
 
         # [Support Legend]
         if self.config.get('legend', False):
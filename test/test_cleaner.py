@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from core.cleaner import DataCleaner
+
+
+def test_nan_literal_cells_are_missing():
+    df = pd.DataFrame({'value': [1.5, 'nan', ' NaN ', '2', 'NaN']})
+    cleaner = DataCleaner(df)
+    cleaner._sanitize_values()
+    out = cleaner.df['value']
+
+    assert pd.api.types.is_float_dtype(out)
+    np.testing.assert_array_equal(out.isna().to_numpy(), [False, True, True, False, True])
+    assert out.iloc[0] == 1.5 and out.iloc[3] == 2.0
+
+
+def test_numeric_string_column_is_float():
+    cleaner = DataCleaner(pd.DataFrame({'value': ['1', '2', '3']}))
+    cleaner._sanitize_values()
+
+    assert cleaner.df['value'].dtype == np.float64
+
+
+def test_float_syntax_not_supported_by_to_numeric():
+    cleaner = DataCleaner(pd.DataFrame({'value': ['1_000', '٣', '2.5 mg']}))
+    cleaner._sanitize_values()
+
+    assert cleaner.df['value'].dtype == np.float64
+    assert cleaner.df['value'].tolist() == [1000.0, 3.0, 2.5]